@@ -1,8 +1,12 @@
-import os, io, tempfile, datetime as dt
+import os, io, json, tempfile, datetime as dt
 from werkzeug.utils import secure_filename
 from werkzeug.security import check_password_hash
 from dotenv import load_dotenv
-from processor import process_cfdi, unzip_folder  # importing our functions
+from processor import process_batch, batch_fingerprint, prune_journals, unzip_folder, export_failed  # importing our functions
+from extractors import saveErrors_to_excel
+from partitions import PARTITION_MODES, partition_filename
+from summary import summary_totals
+from zipfile import ZipFile, ZIP_DEFLATED
 from flask import Flask, render_template, request, send_file, jsonify, make_response, flash, redirect, url_for
 
 # Flask-Login
@@ -64,6 +68,11 @@ def logout():
     logout_user()
     return redirect(url_for("login"))
 
+# Carpeta de checkpoints: sobrevive a un reinicio del contenedor (restart: always)
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "cfdi_checkpoints"))
+# Horas tras las que se borra el journal de un lote abandonado que nunca se volvió a subir
+CHECKPOINT_MAX_AGE_HOURS = float(os.getenv("CHECKPOINT_MAX_AGE_HOURS", "48"))
+
 # Extensiones permitidas
 XML_EXT = {".xml"}
 ZIP_EXT = {".zip"}
@@ -90,7 +99,18 @@ def process_folder():
         output_name = f"Excel_final_{dt.datetime.now().strftime('%Y%m%d_%H%M%S')}"
     output_filename = f"{secure_filename(output_name)}.xlsx"
 
-    counters = {"Total": 0, "I/E": 0, "P": 0, "N": 0, "Desconocido": 0}
+    # Particionado opcional: un Excel por RFC emisor/receptor, por mes o por bloques de filas
+    partition_by = (request.form.get("partition_by", "")).strip() or None
+    row_cap = (request.form.get("row_cap", "")).strip()
+    if partition_by and partition_by not in PARTITION_MODES:
+        return jsonify({"error": f"Particionado no válido: {partition_by}"}), 400
+    if row_cap and (not row_cap.isdigit() or int(row_cap) < 1):
+        return jsonify({"error": "El límite de filas debe ser un número positivo"}), 400
+    row_cap = int(row_cap) if row_cap else None
+
+    counters = {"Total": 0, "I/E": 0, "P": 0, "N": 0, "Desconocido": 0, "Errores": 0}
+    errors = []
+    summary = {}
 
     try:
         with tempfile.TemporaryDirectory() as workdir:
@@ -108,31 +128,67 @@ def process_folder():
                 f.save(path)
                 saved.append(path)
 
+            # (ruta del XML, ZIP de origen, nombre dentro del ZIP)
             xmls = []
             for p in saved:
                 if ext(p) in ZIP_EXT:
-                    extracted = unzip_folder(p, unzipped_dir)
-                    xmls.extend([q for q in extracted if ext(q) in XML_EXT])
+                    # Una carpeta por ZIP para que miembros con el mismo nombre no se sobrescriban
+                    zip_dir = os.path.join(unzipped_dir, os.path.basename(p))
+                    extracted = unzip_folder(p, zip_dir)
+                    xmls.extend([(q, os.path.basename(p), os.path.relpath(q, zip_dir))
+                                 for q in extracted if ext(q) in XML_EXT])
 
-            xmls.extend([p for p in saved if ext(p) in XML_EXT])
+            xmls.extend([(p, None, None) for p in saved if ext(p) in XML_EXT])
 
             if not xmls:
                 return jsonify({"error": "No se encontraron XML"}), 400
 
-            out_path = os.path.join(workdir, output_filename)
-            for xml in xmls:
-                counters["Total"] += 1
-                process_cfdi(xml, out_path, counters)
+            # Si el mismo lote se vuelve a subir tras una caída, se retoma desde el journal.
+            # Dos subidas simultáneas del mismo lote no lo comparten (process_batch lo bloquea).
+            os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+            prune_journals(CHECKPOINT_DIR, CHECKPOINT_MAX_AGE_HOURS * 3600)
+            # La huella se calcula una sola vez: nombra el journal y se pasa a process_batch
+            fingerprint = batch_fingerprint(xmls)
+            journal_path = os.path.join(CHECKPOINT_DIR, f"{fingerprint}.journal")
 
-            with open(out_path, "rb") as f:
-                payload = io.BytesIO(f.read())
+            out_path = os.path.join(workdir, output_filename)
+            # Un XML dañado se registra en "Errores" sin abortar el lote
+            written = process_batch(xmls, out_path, counters, errors, journal_path,
+                                    partition_by=partition_by, row_cap=row_cap, summary=summary,
+                                    fingerprint=fingerprint)
+
+            failed = []
+            if errors:
+                # Con particiones los errores van en su propio archivo dentro del ZIP
+                errors_path = partition_filename(out_path, "Errores") if partition_by else out_path
+                saveErrors_to_excel(errors, errors_path)
+                if partition_by:
+                    written.append(errors_path)
+                # Los XML fallidos se devuelven en el ZIP para corregirlos y subir solo esos
+                failed = export_failed(errors, os.path.join(workdir, "Errores"))
+
+            if partition_by or failed:
+                payload = io.BytesIO()
+                with ZipFile(payload, "w", ZIP_DEFLATED) as zf:
+                    for path in written:
+                        zf.write(path, os.path.basename(path))
+                    for path in failed:
+                        zf.write(path, os.path.relpath(path, workdir))
+                payload.seek(0)
+                download_name = f"{os.path.splitext(output_filename)[0]}.zip"
+                mimetype = "application/zip"
+            else:
+                with open(out_path, "rb") as f:
+                    payload = io.BytesIO(f.read())
+                download_name = output_filename
+                mimetype = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
         # ✅ Construimos la respuesta con headers personalizados
         response = make_response(send_file(
             payload,
             as_attachment=True,
-            download_name=output_filename,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            download_name=download_name,
+            mimetype=mimetype
         ))
 
         response.headers["X-Counter-Total"] = str(counters["Total"])
@@ -140,11 +196,14 @@ def process_folder():
         response.headers["X-Counter-P"] = str(counters["P"])
         response.headers["X-Counter-N"] = str(counters["N"])
         response.headers["X-Counter-Desconocido"] = str(counters["Desconocido"])
+        response.headers["X-Counter-Errores"] = str(counters["Errores"])
+        # Totales por tipo y moneda (el detalle por RFC y mes va en "Resumen")
+        response.headers["X-Resumen"] = json.dumps(summary_totals(summary), separators=(",", ":"))
 
         # Permitir que el frontend lea los headers
         response.headers["Access-Control-Expose-Headers"] = (
             "X-Counter-Total, X-Counter-IE, X-Counter-P, X-Counter-N, "
-            "X-Counter-Desconocido, Content-Disposition"
+            "X-Counter-Desconocido, X-Counter-Errores, X-Resumen, Content-Disposition"
         )
 
         return response
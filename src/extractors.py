@@ -3,6 +3,7 @@ Module containing functions to parse different CFDI types
 and export the extracted data to Excel.
 """
 
+import os
 import xml.etree.ElementTree as ET
 from openpyxl import Workbook, load_workbook
 
@@ -16,6 +17,9 @@ NAMESPACES = {
     'nomina12': 'http://www.sat.gob.mx/nomina12'
 }
 
+# Rows per sheet allowed by Excel, header included
+EXCEL_MAX_ROWS = 1048576
+
 
 # -------------------------
 # Utility functions
@@ -27,6 +31,13 @@ def strip_namespace(tag):
     return tag
 
 
+def get_root(xml_file):
+    """Returns the root element of a CFDI, parsing the file unless it is already parsed."""
+    if isinstance(xml_file, ET.Element):
+        return xml_file
+    return ET.parse(xml_file).getroot()
+
+
 def find_all_tags(root, tag_name):
     """Finds all elements with a specific tag name, ignoring namespaces."""
     return [elem for elem in root.iter() if strip_namespace(elem.tag) == tag_name]
@@ -52,15 +63,83 @@ def get_or_create_sheet(wb, sheet_name, headers):
     return sheet
 
 
+def save_rows_to_excel(blocks, output_file, max_rows=EXCEL_MAX_ROWS, uncapped_sheets=()):
+    """
+    Appends rows to one or more sheets, opening and saving the workbook once.
+
+    A sheet that reaches ``max_rows`` continues in "<name> (2)", "<name> (3)"...
+    with the same headers.
+
+    Args:
+        blocks (list): (sheet name, headers, list of rows) tuples, as returned
+            by the build*_rows functions.
+        output_file (str): Path to the Excel file (created if missing).
+        max_rows (int): Maximum rows per sheet, header included.
+        uncapped_sheets (tuple): Sheets that only roll over at Excel's own
+            limit, whatever ``max_rows`` is (e.g. "Resumen").
+
+    Returns:
+        None
+    """
+    try:
+        wb = load_workbook(output_file)
+    except FileNotFoundError:
+        wb = Workbook()
+
+    for sheet_name, headers, rows in blocks:
+        limit = EXCEL_MAX_ROWS if sheet_name in uncapped_sheets else max_rows
+        part = 1
+        sheet = get_or_create_sheet(wb, sheet_name, headers)
+        used = sheet.max_row
+        for row in rows:
+            # An existing "<name> (n)" may already be full too, so keep moving on
+            while used >= limit:
+                part += 1
+                sheet = get_or_create_sheet(wb, f"{sheet_name} ({part})", headers)
+                used = sheet.max_row
+            sheet.append(row)
+            used += 1
+
+    wb.save(output_file)
+
+
+def write_workbook(blocks, output_file, max_rows=EXCEL_MAX_ROWS, uncapped_sheets=()):
+    """
+    Writes a new workbook with the given sheets, replacing any existing file.
+
+    The workbook is saved to a temporary file first so a crash never leaves
+    a truncated file behind.
+
+    Args:
+        blocks (list): (sheet name, headers, list of rows) tuples.
+        output_file (str): Path to the Excel file.
+        max_rows (int): Maximum rows per sheet, header included.
+        uncapped_sheets (tuple): See save_rows_to_excel.
+
+    Returns:
+        str: The path written.
+    """
+    root, extension = os.path.splitext(output_file)
+    tmp_file = f"{root}.tmp{extension}"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    save_rows_to_excel(blocks, tmp_file, max_rows, uncapped_sheets)
+    os.replace(tmp_file, output_file)
+    return output_file
+
+
 # -------------------------
 # Parsing and saving Pago CFDI
 # -------------------------
 def parse_P(xml_file):
     """
     Parses a CFDI of type 'Pago' and extracts relevant information.
+
+    Args:
+        xml_file (str or Element): Path to the XML file, or its root element
+            when it has already been parsed.
     """
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+    root = get_root(xml_file)
 
     emisor = root.find('cfdi:Emisor', NAMESPACES).attrib
     receptor = root.find('cfdi:Receptor', NAMESPACES).attrib
@@ -99,28 +178,27 @@ def parse_P(xml_file):
     }
 
 
-def writeP_to_excel(data, output_file):
-    """
-    Writes Pago CFDI data to Excel.
-    """
-    try:
-        wb = load_workbook(output_file)
-    except FileNotFoundError:
-        wb = Workbook()
+P_HEADERS = [
+    "UUID Timbre", "Fecha Timbrado",
+    "RFC Emisor", "Nombre Emisor", "Régimen Fiscal Emisor",
+    "RFC Receptor", "Nombre Receptor",
+    "Fecha Pago", "Forma De Pago P", "Moneda P", "Tipo Cambio P", "Monto",
+    "Id Documento", "Serie", "Folio", "Moneda DR", "Equivalencia DR",
+    "Num Parcialidad", "Imp Saldo Ant", "Imp Pagado", "Imp Saldo Insoluto", "Objeto Imp DR"
+]
+
 
-    headers = [
-        "UUID Timbre", "Fecha Timbrado",
-        "RFC Emisor", "Nombre Emisor", "Régimen Fiscal Emisor",
-        "RFC Receptor", "Nombre Receptor",
-        "Fecha Pago", "Forma De Pago P", "Moneda P", "Tipo Cambio P", "Monto",
-        "Id Documento", "Serie", "Folio", "Moneda DR", "Equivalencia DR",
-        "Num Parcialidad", "Imp Saldo Ant", "Imp Pagado", "Imp Saldo Insoluto", "Objeto Imp DR"
-    ]
-    sheet = get_or_create_sheet(wb, "Pagos", headers)
+def buildP_rows(data):
+    """
+    Builds the Excel rows for a Pago CFDI.
 
+    Returns:
+        tuple: (sheet name, headers, list of rows)
+    """
+    rows = []
     for pago in data['Pagos']:
         for docto in pago['DoctosRelacionados']:
-            sheet.append([
+            rows.append([
                 data['TimbreFiscal']['UUID'], data['TimbreFiscal']['FechaTimbrado'],
                 data['Emisor'].get('Rfc'), data['Emisor'].get('Nombre'), data['Emisor'].get('RegimenFiscal'),
                 data['Receptor'].get('Rfc'), data['Receptor'].get('Nombre'),
@@ -131,8 +209,14 @@ def writeP_to_excel(data, output_file):
                 docto.get('NumParcialidad'), docto.get('ImpSaldoAnt'),
                 docto.get('ImpPagado'), docto.get('ImpSaldoInsoluto'), docto.get('ObjetoImpDR')
             ])
+    return "Pagos", P_HEADERS, rows
 
-    wb.save(output_file)
+
+def writeP_to_excel(data, output_file):
+    """
+    Writes Pago CFDI data to Excel.
+    """
+    save_rows_to_excel([buildP_rows(data)], output_file)
 
 
 # -------------------------
@@ -141,9 +225,12 @@ def writeP_to_excel(data, output_file):
 def parse_IE(xml_file):
     """
     Parses a CFDI of type 'Ingreso' or 'Egreso' and extracts relevant data.
+
+    Args:
+        xml_file (str or Element): Path to the XML file, or its root element
+            when it has already been parsed.
     """
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+    root = get_root(xml_file)
 
     comprobante = {k: root.attrib.get(k) for k in [
         'Version', 'Serie', 'Folio', 'Fecha', 'SubTotal', 'Total', 'FormaPago', 'TipoDeComprobante', 'Moneda'
@@ -181,29 +268,28 @@ def parse_IE(xml_file):
     }
 
 
-def saveIE_to_excel(data, output_file):
-    """
-    Writes Ingreso/Egreso CFDI data to Excel.
+IE_HEADERS = [
+    "UUID", "Fecha", "Serie", "Folio", "Tipo",
+    "RFC Emisor", "Nombre Emisor", "Régimen Fiscal",
+    "Cantidad", "Valor Unitario", "Importe", "Traslado Importe",
+    "Subtotal", "Total", "Forma de Pago", "Descripción",
+    "Moneda", "Uso CFDI",
+    "RFC Receptor", "Nombre Receptor", "Domicilio", "Régimen Fiscal",
+    "Traslado Base", "Fecha Timbrado", "Versión"
+]
+
+
+def buildIE_rows(data):
     """
-    try:
-        wb = load_workbook(output_file)
-    except FileNotFoundError:
-        wb = Workbook()
+    Builds the Excel rows for an Ingreso/Egreso CFDI.
 
+    Returns:
+        tuple: (sheet name, headers, list of rows)
+    """
     sheet_name = "Ingresos" if data['Comprobante']['TipoDeComprobante'] == 'I' else "Egresos"
-    headers = [
-        "UUID", "Fecha", "Serie", "Folio", "Tipo",
-        "RFC Emisor", "Nombre Emisor", "Régimen Fiscal",
-        "Cantidad", "Valor Unitario", "Importe", "Traslado Importe",
-        "Subtotal", "Total", "Forma de Pago", "Descripción",
-        "Moneda", "Uso CFDI",
-        "RFC Receptor", "Nombre Receptor", "Domicilio", "Régimen Fiscal",
-        "Traslado Base", "Fecha Timbrado", "Versión"
-    ]
-    sheet = get_or_create_sheet(wb, sheet_name, headers)
-
+    rows = []
     for concepto in data['Conceptos']:
-        sheet.append([
+        rows.append([
             data['TimbreFiscal']['UUID'], data['Comprobante']['Fecha'],
             data['Comprobante']['Serie'], data['Comprobante']['Folio'],
             data['Comprobante']['TipoDeComprobante'],
@@ -216,8 +302,14 @@ def saveIE_to_excel(data, output_file):
             data['Receptor'].get('RegimenFiscalReceptor'), concepto.get('Traslado_Base'),
             data['TimbreFiscal']['FechaTimbrado'], data['Comprobante']['Version']
         ])
+    return sheet_name, IE_HEADERS, rows
 
-    wb.save(output_file)
+
+def saveIE_to_excel(data, output_file):
+    """
+    Writes Ingreso/Egreso CFDI data to Excel.
+    """
+    save_rows_to_excel([buildIE_rows(data)], output_file)
 
 
 # -------------------------
@@ -226,9 +318,12 @@ def saveIE_to_excel(data, output_file):
 def parse_N(xml_file):
     """
     Parses a CFDI of type 'Nómina' and extracts relevant information.
+
+    Args:
+        xml_file (str or Element): Path to the XML file, or its root element
+            when it has already been parsed.
     """
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+    root = get_root(xml_file)
 
     comprobante = {
         'Serie': root.attrib.get('Serie', 'N/A'),
@@ -310,27 +405,26 @@ def parse_N(xml_file):
     }
 
 
-def saveN_to_excel(data, output_file):
-    """
-    Writes Nómina CFDI data to Excel.
-    """
-    try:
-        wb = load_workbook(output_file)
-    except FileNotFoundError:
-        wb = Workbook()
+N_HEADERS = [
+    "UUID", "Fecha Timbrado",
+    "Serie", "Folio", "Fecha", "Moneda", "SubTotal", "Descuento", "Total",
+    "RFC Emisor", "Nombre Emisor",
+    "RFC Receptor", "Nombre Receptor",
+    "Descripcion", "Cantidad", "Valor Unitario", "Importe",
+    "Version Nómina", "Tipo Nómina", "Total Percepciones", "Total Deducciones", "Total Otros Pagos"
+]
 
-    headers = [
-        "UUID", "Fecha Timbrado",
-        "Serie", "Folio", "Fecha", "Moneda", "SubTotal", "Descuento", "Total",
-        "RFC Emisor", "Nombre Emisor",
-        "RFC Receptor", "Nombre Receptor",
-        "Descripcion", "Cantidad", "Valor Unitario", "Importe",
-        "Version Nómina", "Tipo Nómina", "Total Percepciones", "Total Deducciones", "Total Otros Pagos"
-    ]
-    sheet = get_or_create_sheet(wb, "Nómina", headers)
 
+def buildN_rows(data):
+    """
+    Builds the Excel rows for a Nómina CFDI.
+
+    Returns:
+        tuple: (sheet name, headers, list of rows)
+    """
+    rows = []
     for concepto in data['Conceptos']:
-        sheet.append([
+        rows.append([
             data['TimbreFiscal']['UUID'], data['TimbreFiscal']['FechaTimbrado'],
             data['Comprobante']['Serie'], data['Comprobante']['Folio'], data['Comprobante']['Fecha'],
             data['Comprobante']['Moneda'], data['Comprobante']['SubTotal'], data['Comprobante']['Descuento'], data['Comprobante']['Total'],
@@ -339,5 +433,25 @@ def saveN_to_excel(data, output_file):
             concepto.get('Descripcion', 'N/A'), concepto.get('Cantidad', '0'), concepto.get('ValorUnitario', '0.00'), concepto.get('Importe', '0.00'),
             data['Nomina']['Version'], data['Nomina']['TipoNomina'], data['Nomina']['TotalPercepciones'], data['Nomina']['TotalDeducciones'], data['Nomina']['TotalOtrosPagos']
         ])
+    return "Nómina", N_HEADERS, rows
 
-    wb.save(output_file)
+
+def saveN_to_excel(data, output_file):
+    """
+    Writes Nómina CFDI data to Excel.
+    """
+    save_rows_to_excel([buildN_rows(data)], output_file)
+
+
+# -------------------------
+# Saving the error report
+# -------------------------
+ERROR_HEADERS = ["Archivo", "ZIP", "Miembro", "Tipo", "Etapa", "Error"]
+
+
+def saveErrors_to_excel(errors, output_file):
+    """
+    Writes the files that failed during a run to an "Errores" sheet.
+    """
+    rows = [[error.get(h) for h in ERROR_HEADERS] for error in errors]
+    save_rows_to_excel([("Errores", ERROR_HEADERS, rows)], output_file)
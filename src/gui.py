@@ -3,7 +3,8 @@ import os
 import sys
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
-from processor import process_cfdi, unzip_folder  
+from processor import process_batch, unzip_folder, retry_failed, export_failed
+from extractors import saveErrors_to_excel
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout,QWidget, QFileDialog, QLabel, QLineEdit, QMessageBox)
 
 
@@ -88,26 +89,40 @@ class FolderSelectorApp(QMainWindow):
             output_path = os.path.join(folder2, output_filename)
 
             # Counters for CFDI types
-            counters = {"Total": 0, "I/E": 0, "P": 0, "N": 0, "Desconocido": 0}
+            counters = {"Total": 0, "I/E": 0, "P": 0, "N": 0, "Desconocido": 0, "Errores": 0}
+            errors = []
             unzipped_folder = os.path.join(folder2, "unzipped")
             os.makedirs(unzipped_folder, exist_ok=True)
 
-            # Process each zip file in the source folder
+            # Collect the XML files of each zip file in the source folder
+            cfdi_files = []
             for zip_file in os.listdir(folder1):
                 zip_path = os.path.join(folder1, zip_file)
                 if zip_file.endswith(".zip"):
                     print(f"Procesando archivo ZIP: {zip_file}")
-                    extracted_files = unzip_folder(zip_path, unzipped_folder)
+                    # One folder per ZIP so equal member names don't overwrite each other
+                    zip_folder = os.path.join(unzipped_folder, zip_file)
+                    extracted_files = unzip_folder(zip_path, zip_folder)
                     for cfdi_file in extracted_files:
                         if cfdi_file.endswith(".xml"):
-                            counters["Total"] += 1
-                            process_cfdi(cfdi_file, output_path, counters)
+                            cfdi_files.append((cfdi_file, zip_file, os.path.relpath(cfdi_file, zip_folder)))
+
+            # The journal lets an interrupted run resume where it stopped
+            journal_path = os.path.join(folder2, f".{output_filename_obtained}.journal")
+            process_batch(cfdi_files, output_path, counters, errors, journal_path)
+
+            # Copy the failed files aside so they can be fixed, then offer to retry only those
+            failed_folder = os.path.join(folder2, f"errores_{output_filename_obtained}")
+            export_failed(errors, failed_folder)
+            errors = self.ask_for_retry(errors, output_path, counters, failed_folder)
+            if errors:
+                saveErrors_to_excel(errors, output_path)
 
             # Show success message
             QMessageBox.information(self, "Éxito", "El procesamiento se completó con éxito.")
             print("\nResumen de procesamiento:")
             print(f"Total XML procesados: {counters['Total']}")
-            print(f"I/E: {counters['I/E']}, P: {counters['P']}, N: {counters['N']}, Desconocidos: {counters['Desconocido']}")
+            print(f"I/E: {counters['I/E']}, P: {counters['P']}, N: {counters['N']}, Desconocidos: {counters['Desconocido']}, Errores: {counters['Errores']}")
 
             # Ask if user wants to perform another operation
             self.ask_for_restart()
@@ -118,6 +133,20 @@ class FolderSelectorApp(QMainWindow):
             # Clear status
             self.status_label.setText("")
 
+    def ask_for_retry(self, errors, output_path, counters, failed_folder):
+        while errors:
+            reply = QMessageBox.question(
+                self,
+                "Archivos con error",
+                f"{len(errors)} archivo(s) no se pudieron procesar y se copiaron a:\n{failed_folder}\n\n"
+                "Corrige esos archivos y pulsa Sí para reintentar solo esos archivos.",
+                QMessageBox.Yes | QMessageBox.No,
+            )
+            if reply != QMessageBox.Yes:
+                break
+            errors = retry_failed(errors, output_path, counters)
+        return errors
+
     def ask_for_restart(self):
         reply = QMessageBox.question(
             self,
@@ -1,5 +1,54 @@
 import xml.etree.ElementTree as ET
 
+def read_cfdi(xml_file):
+    """
+    Parses a CFDI once and reads what is needed to pick its extractors.
+
+    The parsed root is returned too, so the extractors work on it instead
+    of reading the file again.
+
+    Args:
+        xml_file (str): Path to the XML file.
+
+    Returns:
+        tuple: (root, type, version, complement namespaces). root is None
+               when the file can't be read; see determine_xml_header for the rest.
+    """
+    try:
+        root = ET.parse(xml_file).getroot()
+    except ET.ParseError as e:
+        return None, f"Error parsing XML: {e}", None, frozenset()
+    except FileNotFoundError:
+        return None, "File not found", None, frozenset()
+    except Exception as e:
+        return None, f"Unexpected error: {e}", None, frozenset()
+
+    tipo_comprobante = (root.attrib.get('TipoDeComprobante') or '').strip() or "Unknown"
+
+    complements = set()
+    for child in root:
+        if child.tag.endswith('}Complemento') or child.tag == 'Complemento':
+            complements.update(c.tag[1:].split('}', 1)[0] for c in child if c.tag.startswith('{'))
+
+    return root, tipo_comprobante, root.attrib.get('Version'), frozenset(complements)
+
+
+def determine_xml_header(xml_file):
+    """
+    Reads what is needed to pick the extractors of a CFDI: its type, its
+    version and the namespaces of the complementos it carries.
+
+    Args:
+        xml_file (str): Path to the XML file.
+
+    Returns:
+        tuple: (type, version, complement namespaces). The type follows
+               determine_xml_type (including its error messages); version is
+               None and the namespaces empty when they can't be read.
+    """
+    return read_cfdi(xml_file)[1:]
+
+
 def determine_xml_type(xml_file):
     """
     Determines the CFDI type (TipoDeComprobante) from an XML file.
@@ -16,20 +65,4 @@ def determine_xml_type(xml_file):
              - "Unknown" if the attribute is missing
              - Error message if parsing fails
     """
-    try:
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
-
-        tipo_comprobante = root.attrib.get('TipoDeComprobante')
-        if tipo_comprobante:
-            return tipo_comprobante.strip()
-        return "Unknown"
-
-    except ET.ParseError as e:
-        return f"Error parsing XML: {e}"
-
-    except FileNotFoundError:
-        return "File not found"
-
-    except Exception as e:
-        return f"Unexpected error: {e}"
+    return determine_xml_header(xml_file)[0]
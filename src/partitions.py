@@ -0,0 +1,112 @@
+"""
+Module containing functions to split the extracted rows into several
+workbooks (by RFC, by month or by number of rows) and write them in parallel.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from extractors import write_workbook, EXCEL_MAX_ROWS
+
+# -------------------------
+# Partition modes
+# -------------------------
+# Columns looked up (first one present in the sheet) to group each row
+PARTITION_COLUMNS = {
+    'emisor': ("RFC Emisor",),
+    'receptor': ("RFC Receptor",),
+    'mes': ("Fecha", "Fecha Pago"),
+}
+PARTITION_MODES = tuple(PARTITION_COLUMNS) + ('filas',)
+
+
+def partition_filename(output_file, key):
+    """Returns the path of a partition, e.g. Excel_final.xlsx -> Excel_final_2024-01.xlsx."""
+    root, extension = os.path.splitext(output_file)
+    return f"{root}_{key}{extension}"
+
+
+def partition_key(partition_by, value):
+    """
+    Turns a cell value into the key (and file name suffix) of its partition.
+
+    Args:
+        partition_by (str): "emisor", "receptor" or "mes".
+        value (str): RFC or date of the row.
+
+    Returns:
+        str: The RFC, or the month as YYYY-MM.
+    """
+    if partition_by == 'mes':
+        value = (value or '')[:7]
+    key = re.sub(r'[^\w-]', '', value or '')
+    if key:
+        return key
+    return "SinFecha" if partition_by == 'mes' else "SinRFC"
+
+
+def split_blocks(blocks, partition_by, row_cap=None):
+    """
+    Distributes the rows of each sheet among partitions.
+
+    Every partition keeps the sheet names and headers of the original blocks.
+
+    Args:
+        blocks (list): (sheet name, headers, list of rows) tuples.
+        partition_by (str): One of PARTITION_MODES.
+        row_cap (int, optional): Data rows per file with partition_by="filas".
+
+    Returns:
+        dict: Partition key -> list of (sheet name, headers, rows), sorted by key.
+    """
+    partitions = {}
+    for sheet_name, headers, rows in blocks:
+        if partition_by == 'filas':
+            cap = row_cap or EXCEL_MAX_ROWS - 1
+            for number, start in enumerate(range(0, len(rows), cap), 1):
+                sheets = partitions.setdefault(f"{number:03d}", {})
+                sheets.setdefault(sheet_name, (headers, []))[1].extend(rows[start:start + cap])
+            continue
+
+        index = next((headers.index(c) for c in PARTITION_COLUMNS[partition_by] if c in headers), None)
+        for row in rows:
+            key = partition_key(partition_by, row[index] if index is not None else None)
+            sheets = partitions.setdefault(key, {})
+            sheets.setdefault(sheet_name, (headers, []))[1].append(row)
+
+    return {
+        key: [(name, headers, rows) for name, (headers, rows) in partitions[key].items()]
+        for key in sorted(partitions)
+    }
+
+
+def write_partitions(blocks, output_file, partition_by, row_cap=None, max_workers=None):
+    """
+    Splits the rows into partitions and writes one workbook per partition.
+
+    Workbooks are written concurrently in separate processes, since building
+    an .xlsx is CPU bound.
+
+    Args:
+        blocks (list): (sheet name, headers, list of rows) tuples.
+        output_file (str): Base path; each partition adds its key to the name.
+        partition_by (str): "emisor", "receptor", "mes" or "filas".
+        row_cap (int, optional): Maximum data rows per sheet (per file with "filas").
+        max_workers (int, optional): Number of writer processes.
+
+    Returns:
+        list: Paths of the workbooks written.
+    """
+    if partition_by not in PARTITION_MODES:
+        raise ValueError(f"Unknown partition mode: {partition_by}")
+
+    partitions = split_blocks(blocks, partition_by, row_cap)
+    filenames = [partition_filename(output_file, key) for key in partitions]
+    max_rows = row_cap + 1 if row_cap else EXCEL_MAX_ROWS
+
+    if len(partitions) <= 1:
+        return [write_workbook(b, f, max_rows) for b, f in zip(partitions.values(), filenames)]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(write_workbook, partitions.values(), filenames,
+                                 [max_rows] * len(filenames)))
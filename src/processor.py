@@ -1,10 +1,89 @@
 import os
+import json
+import shutil
+import hashlib
+import time
 from zipfile import ZipFile
-from identifier import determine_xml_type
-from extractors import (parse_IE, parse_P, parse_N,saveIE_to_excel, writeP_to_excel, saveN_to_excel)
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+from identifier import read_cfdi
+from extractors import get_root, save_rows_to_excel, saveErrors_to_excel, write_workbook, EXCEL_MAX_ROWS
+from partitions import write_partitions, partition_filename
+from registry import find_extractors, check_blocks
+from summary import add_to_summary, buildSummary_rows
 
-def process_cfdi(cfdi_filename, output_filename, counters):
+# Messages returned by read_cfdi when the file cannot be read
+IDENTIFIER_ERRORS = ("Error parsing XML", "File not found", "Unexpected error")
+
+# Number of files processed between two journal commits in process_batch
+CHECKPOINT_EVERY = 500
+
+
+def extract_cfdi(cfdi_filename, cfdi_type, version=None, complements=frozenset(), root=None):
+    """
+    Parses a CFDI XML file and converts it into Excel rows, running every
+    extractor of the registry that applies to it.
+
+    Args:
+        cfdi_filename (str): Path to the CFDI XML file.
+        cfdi_type (str): Type returned by read_cfdi.
+        version (str, optional): CFDI version returned by read_cfdi.
+        complements (frozenset): Complemento namespaces returned by read_cfdi.
+        root (Element, optional): Root returned by read_cfdi; the file is only
+            parsed here if it is not given.
+
+    Returns:
+        tuple: (counter key, blocks, extracted) where blocks is a list of
+               (sheet name, headers, rows) and extracted lists the
+               (extractor, parsed data) pairs, for summarize_extracted.
+               Unknown types return ("Desconocido", [], []).
+    """
+    extractors = find_extractors(cfdi_type, version, complements)
+    if not extractors:
+        print(f"Unknown CFDI type: {cfdi_type}")
+        return "Desconocido", [], []
+
+    if root is None:
+        root = get_root(cfdi_filename)
+
+    counter_key, blocks, extracted = None, [], []
+    for extractor in extractors:
+        extracted_data = extractor.parse(root)
+        if extracted_data is None:
+            continue
+        print(f"Extracted data ({cfdi_type}, {extractor.name}): {extracted_data}")
+        blocks.extend(check_blocks(extractor, extractor.build_rows(extracted_data)))
+        extracted.append((extractor, extracted_data))
+        counter_key = counter_key or extractor.counter
+
+    return counter_key or "Desconocido", blocks, extracted
+
+
+def summarize_extracted(cfdi_type, extracted):
+    """
+    Computes the summary entries of a CFDI from the data returned by extract_cfdi.
+
+    Kept apart from the row extraction so a bad amount can only exclude the
+    CFDI from the summary, never drop its rows.
+
+    Returns:
+        list: Entries for summary.add_to_summary.
+
+    Raises:
+        ValueError: If an amount is not a number.
+    """
+    entries = []
+    for extractor, extracted_data in extracted:
+        if extractor.summarize:
+            entries.extend(extractor.summarize(cfdi_type, extracted_data))
+    return entries
+
+
+def process_cfdi(cfdi_filename, output_filename, counters, errors=None, zip_name=None, zip_member=None):
     """
     Processes a single CFDI XML file based on its type and updates counters.
 
@@ -12,32 +91,469 @@ def process_cfdi(cfdi_filename, output_filename, counters):
         cfdi_filename (str): Path to the CFDI XML file.
         output_filename (str): Path to the Excel file where data will be saved.
         counters (dict): Dictionary tracking totals for each CFDI type.
+        errors (list, optional): If given, a failure while parsing or saving is
+            recorded here (see ``record_error``) instead of being raised, so the
+            rest of the batch can continue.
+        zip_name (str, optional): ZIP file the XML came from, for the error report.
+        zip_member (str, optional): Name of the XML inside that ZIP.
 
     Returns:
-        None
+        bool: True if the file was processed, False if it failed and was recorded.
     """
     print(f"Processing CFDI: {cfdi_filename}")
 
-    cfdi_type = determine_xml_type(cfdi_filename)
+    root, cfdi_type, version, complements = read_cfdi(cfdi_filename)
     print(f"Detected CFDI type: {cfdi_type}")
 
-    # Mapping CFDI types to parsing and saving functions
-    type_actions = {
-        "I": (parse_IE, saveIE_to_excel, "I/E"),
-        "E": (parse_IE, saveIE_to_excel, "I/E"),
-        "P": (parse_P, writeP_to_excel, "P"),
-        "N": (parse_N, saveN_to_excel, "N")
+    if errors is not None and cfdi_type.startswith(IDENTIFIER_ERRORS):
+        # The XML could not even be read; report it instead of counting it as unknown
+        record_error(errors, counters, build_error(cfdi_filename, "Desconocido", cfdi_type, zip_name, zip_member))
+        return False
+
+    try:
+        counter_key, blocks, _ = extract_cfdi(cfdi_filename, cfdi_type, version, complements, root)
+        if blocks:
+            save_rows_to_excel(blocks, output_filename)
+    except Exception as e:
+        if errors is None:
+            raise
+        record_error(errors, counters, build_error(cfdi_filename, cfdi_type, f"{type(e).__name__}: {e}",
+                                                   zip_name, zip_member))
+        return False
+
+    counters[counter_key] = counters.get(counter_key, 0) + 1
+    return True
+
+
+def build_error(cfdi_filename, cfdi_type, message, zip_name=None, zip_member=None, stage="Extracción"):
+    """
+    Builds an entry of the error report.
+
+    Args:
+        cfdi_filename (str): Path to the CFDI XML file that failed.
+        cfdi_type (str): Detected CFDI type.
+        message (str): Description of the failure (exception type and text).
+        zip_name (str, optional): ZIP file the XML came from.
+        zip_member (str, optional): Name of the XML inside that ZIP.
+        stage (str): "Extracción" when the file was left out, "Resumen" when
+            its rows were exported but it could not be added to the summary.
+
+    Returns:
+        dict: The error entry.
+    """
+    print(f"Error processing {cfdi_filename}: {message}")
+    return {
+        'Archivo': os.path.basename(cfdi_filename),
+        'ZIP': zip_name or '',
+        'Miembro': zip_member or '',
+        'Tipo': cfdi_type,
+        'Etapa': stage,
+        'Error': message,
+        'Ruta': cfdi_filename
     }
 
-    if cfdi_type in type_actions:
-        parse_func, save_func, counter_key = type_actions[cfdi_type]
-        counters[counter_key] += 1
-        extracted_data = parse_func(cfdi_filename)
-        print(f"Extracted data ({cfdi_type}): {extracted_data}")
-        save_func(extracted_data, output_filename)
+
+def record_error(errors, counters, error):
+    """
+    Adds a failed CFDI to the error report and updates the error counter.
+
+    Args:
+        errors (list): Error report being built for the current run.
+        counters (dict): Dictionary tracking totals for each CFDI type.
+        error (dict): Entry returned by build_error.
+
+    Returns:
+        None
+    """
+    counters["Errores"] = counters.get("Errores", 0) + 1
+    errors.append(error)
+
+
+def retry_failed(errors, output_filename, counters):
+    """
+    Reprocesses only the files listed in an error report.
+
+    Files that succeed are appended to the existing Excel file; the
+    successfully processed ones from the original run are not touched.
+    Summary-only entries (stage "Resumen") already have their rows in the
+    file and are returned unchanged.
+
+    Args:
+        errors (list): Error report returned by a previous run.
+        output_filename (str): Path to the Excel file of that run.
+        counters (dict): Dictionary tracking totals for each CFDI type.
+
+    Returns:
+        list: The files that failed again, in the same format.
+    """
+    still_failing = []
+    for error in errors:
+        if error.get('Etapa') == "Resumen":
+            still_failing.append(error)
+            continue
+        counters["Errores"] = max(counters.get("Errores", 0) - 1, 0)
+        process_cfdi(error['Ruta'], output_filename, counters, still_failing,
+                     error['ZIP'], error['Miembro'])
+    return still_failing
+
+
+def export_failed(errors, destination_folder):
+    """
+    Copies the XML files listed in an error report to a folder, keeping
+    their ZIP and member names, so they can be corrected and processed again
+    on their own. Each entry's 'Ruta' is updated to point to its copy, so
+    retry_failed reads the corrected file.
+
+    Args:
+        errors (list): Error report of the run.
+        destination_folder (str): Folder that receives the copies.
+
+    Returns:
+        list: Paths of the copies.
+    """
+    copied = []
+    for error in errors:
+        if error.get('Etapa') == "Resumen" or not os.path.isfile(error['Ruta']):
+            continue
+        relative = os.path.normpath(os.path.join(error['ZIP'], error['Miembro']) if error['ZIP']
+                                    else error['Archivo'])
+        if os.path.isabs(relative) or relative.startswith('..'):
+            relative = error['Archivo']
+        target = os.path.join(destination_folder, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.abspath(target) != os.path.abspath(error['Ruta']):
+            shutil.copy2(error['Ruta'], target)
+        error['Ruta'] = target
+        copied.append(target)
+    return copied
+
+
+# -------------------------
+# Checkpointed batches
+# -------------------------
+def cfdi_key(cfdi_filename, zip_name=None, zip_member=None):
+    """Stable name of a CFDI inside a run, independent of where it was extracted."""
+    if zip_name:
+        return f"{zip_name}/{zip_member or os.path.basename(cfdi_filename)}"
+    return os.path.basename(cfdi_filename)
+
+
+def batch_fingerprint(cfdi_files):
+    """
+    Identifies a batch by the names and contents of its files, so a journal
+    is only resumed by the same input (a corrected re-export with the same
+    names and sizes starts over). A file that can't be read doesn't stop the
+    batch; process_batch records it in the error report.
+
+    Args:
+        cfdi_files (list): (path, zip name, zip member) tuples.
+
+    Returns:
+        str: Hex digest of the batch.
+    """
+    digest = hashlib.sha1()
+    for cfdi_filename, zip_name, zip_member in cfdi_files:
+        digest.update(cfdi_key(cfdi_filename, zip_name, zip_member).encode("utf-8"))
+        try:
+            with open(cfdi_filename, "rb") as cfdi:
+                digest.update(hashlib.sha1(cfdi.read()).digest())
+        except OSError:
+            # Reported as a per-file error when the batch reaches it
+            digest.update(b"unreadable")
+    return digest.hexdigest()
+
+
+def lock_journal(journal_filename):
+    """
+    Takes an exclusive lock on a journal for the current run.
+
+    The lock belongs to the process and is released by the OS if it dies,
+    so a crashed run never blocks its own resume.
+
+    Args:
+        journal_filename (str): Path to the journal file.
+
+    Returns:
+        file: Open lock file to pass to unlock_journal, or None if another
+              run of the same batch holds the journal.
+    """
+    lock = open(journal_filename + ".lock", "a+b")
+    try:
+        if fcntl:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
+def unlock_journal(lock):
+    """Removes and releases a lock taken with lock_journal."""
+    try:
+        os.remove(lock.name)
+    except OSError:
+        pass  # Windows can't remove a locked file; it is reused next time
+    lock.close()
+
+
+def prune_journals(journal_folder, max_age):
+    """
+    Deletes the journals of batches that were abandoned and never resumed.
+
+    A journal is only removed after a successful run, so one left by a batch
+    that is never uploaded again would keep its buffered rows forever. A
+    journal still held by a running batch (see lock_journal) is kept.
+
+    Args:
+        journal_folder (str): Folder holding the journals.
+        max_age (float): Seconds since a journal's last checkpoint after
+            which it is considered abandoned.
+
+    Returns:
+        list: Paths of the journals removed.
+    """
+    removed = []
+    cutoff = time.time() - max_age
+    for name in os.listdir(journal_folder):
+        journal_filename = os.path.join(journal_folder, name)
+        try:
+            if not name.endswith(".journal") or os.path.getmtime(journal_filename) > cutoff:
+                continue
+        except OSError:
+            continue  # Removed by its own run meanwhile
+        lock = lock_journal(journal_filename)
+        if lock is None:
+            continue
+        try:
+            os.remove(journal_filename)
+            removed.append(journal_filename)
+        except OSError:
+            pass
+        finally:
+            unlock_journal(lock)
+    return removed
+
+
+def load_journal(journal_filename, fingerprint):
+    """
+    Reads the checkpoints committed by a previous, interrupted run.
+
+    A journal from a different batch is discarded, and a line left half
+    written by a crash is cut off so new checkpoints can be appended.
+
+    Args:
+        journal_filename (str): Path to the journal file.
+        fingerprint (str): Value returned by batch_fingerprint for this batch.
+
+    Returns:
+        tuple: (list of file entries, dict of sheet headers)
+    """
+    entries, headers = [], {}
+    if not os.path.exists(journal_filename):
+        return entries, headers
+
+    with open(journal_filename, "r+b") as journal:
+        first = journal.readline()
+        try:
+            if json.loads(first).get("fingerprint") != fingerprint:
+                raise ValueError("journal belongs to another batch")
+        except ValueError:
+            journal.truncate(0)
+            return entries, headers
+
+        good_offset = journal.tell()
+        for line in journal:
+            try:
+                chunk = json.loads(line)
+            except ValueError:
+                break
+            headers.update(chunk["headers"])
+            entries.extend(chunk["files"])
+            good_offset = journal.tell()
+        journal.truncate(good_offset)
+
+    print(f"Resuming batch: {len(entries)} files already processed")
+    return entries, headers
+
+
+def commit_checkpoint(journal_filename, fingerprint, pending, headers):
+    """
+    Appends the files processed since the last checkpoint to the journal.
+
+    Args:
+        journal_filename (str): Path to the journal file.
+        fingerprint (str): Value returned by batch_fingerprint for this batch.
+        pending (list): File entries not yet committed.
+        headers (dict): Headers of the sheets the entries write to.
+
+    Returns:
+        None
+    """
+    new_journal = not os.path.exists(journal_filename) or os.path.getsize(journal_filename) == 0
+    with open(journal_filename, "a", encoding="utf-8") as journal:
+        if new_journal:
+            journal.write(json.dumps({"fingerprint": fingerprint}) + "\n")
+        journal.write(json.dumps({"headers": headers, "files": pending}, ensure_ascii=False) + "\n")
+        journal.flush()
+        os.fsync(journal.fileno())
+
+
+def process_batch(cfdi_files, output_filename, counters, errors, journal_filename=None,
+                  checkpoint_every=CHECKPOINT_EVERY, partition_by=None, row_cap=None, summary=None,
+                  fingerprint=None):
+    """
+    Processes a list of CFDI files and writes them to Excel in a single save.
+
+    Rows are buffered in memory and, if a journal is given, committed to it
+    every ``checkpoint_every`` files. Running the same batch again after a
+    crash skips the files found in the journal and produces the same
+    workbook. The journal is deleted once the workbook is written. While a
+    run holds the journal (see lock_journal), a concurrent run of the same
+    batch works without checkpoints instead of sharing it.
+
+    With ``partition_by`` the rows are split into several workbooks (see
+    partitions.write_partitions) written in parallel.
+
+    With ``summary`` the totals of every CFDI are added up as it is extracted
+    (see summary.py) and written to a "Resumen" sheet, or to a separate
+    "<name>_Resumen" workbook when partitioning.
+
+    Args:
+        cfdi_files (list): (path, zip name, zip member) tuples; zip name and
+            member are None for loose XML files.
+        output_filename (str): Path to the Excel file (overwritten).
+        counters (dict): Dictionary tracking totals for each CFDI type.
+        errors (list): Receives the files that failed (see build_error).
+        journal_filename (str, optional): Path to the checkpoint journal.
+        checkpoint_every (int): Files processed between journal commits.
+        partition_by (str, optional): "emisor", "receptor", "mes" or "filas".
+        row_cap (int, optional): Maximum data rows per sheet before rolling
+            over to a new sheet (or a new file with partition_by="filas").
+        summary (dict, optional): Receives the running totals.
+        fingerprint (str, optional): batch_fingerprint of ``cfdi_files``, if
+            the caller already computed it (e.g. to name the journal), so the
+            input is not read twice.
+
+    Returns:
+        list: Paths of the workbooks written.
+    """
+    lock = lock_journal(journal_filename) if journal_filename else None
+    if journal_filename and lock is None:
+        # The same batch is already running elsewhere; don't share its journal
+        print(f"Journal {journal_filename} is in use, running without checkpoints")
+        journal_filename = None
+
+    try:
+        return _process_batch(cfdi_files, output_filename, counters, errors, journal_filename,
+                              checkpoint_every, partition_by, row_cap, summary, fingerprint)
+    finally:
+        if lock:
+            unlock_journal(lock)
+
+
+def _process_batch(cfdi_files, output_filename, counters, errors, journal_filename,
+                   checkpoint_every, partition_by, row_cap, summary, fingerprint):
+    """Body of process_batch, run while holding the journal lock."""
+    if journal_filename and fingerprint is None:
+        fingerprint = batch_fingerprint(cfdi_files)
+    entries, headers = load_journal(journal_filename, fingerprint) if journal_filename else ([], {})
+
+    results = {}
+
+    def apply_entry(entry):
+        counters["Total"] += 1
+        if entry.get("error"):
+            record_error(errors, counters, entry["error"])
+        else:
+            counters[entry["counter"]] = counters.get(entry["counter"], 0) + 1
+            if summary is not None:
+                add_to_summary(summary, entry.get("summary", []))
+            if entry.get("summary_error"):
+                # Listed in the report, but the file itself was processed
+                errors.append(entry["summary_error"])
+        results[entry["key"]] = entry.get("blocks", [])
+
+    # Paths stored in the journal belong to the interrupted run (e.g. a temporary
+    # folder that no longer exists); point its errors to this run's copies
+    paths = {cfdi_key(cfdi_filename, zip_name, zip_member): cfdi_filename
+             for cfdi_filename, zip_name, zip_member in cfdi_files}
+    for entry in entries:
+        for field in ("error", "summary_error"):
+            if entry.get(field) and entry["key"] in paths:
+                entry[field]["Ruta"] = paths[entry["key"]]
+        apply_entry(entry)
+
+    pending, pending_headers = [], {}
+    for cfdi_filename, zip_name, zip_member in cfdi_files:
+        key = cfdi_key(cfdi_filename, zip_name, zip_member)
+        if key in results:
+            continue
+
+        print(f"Processing CFDI: {cfdi_filename}")
+        root, cfdi_type, version, complements = read_cfdi(cfdi_filename)
+        print(f"Detected CFDI type: {cfdi_type}")
+
+        entry = {"key": key}
+        if cfdi_type.startswith(IDENTIFIER_ERRORS):
+            entry["error"] = build_error(cfdi_filename, "Desconocido", cfdi_type, zip_name, zip_member)
+        else:
+            try:
+                entry["counter"], blocks, extracted = extract_cfdi(cfdi_filename, cfdi_type,
+                                                                   version, complements, root)
+                for sheet_name, sheet_headers, rows in blocks:
+                    # A journal written with other columns (e.g. a plugin changed) can't be mixed in
+                    if list(headers.setdefault(sheet_name, list(sheet_headers))) != list(sheet_headers):
+                        raise ValueError(f"Sheet {sheet_name} already has different columns")
+                entry["blocks"] = [[sheet_name, rows] for sheet_name, sheet_headers, rows in blocks]
+                for sheet_name, sheet_headers, rows in blocks:
+                    pending_headers.setdefault(sheet_name, list(sheet_headers))
+            except Exception as e:
+                entry["error"] = build_error(cfdi_filename, cfdi_type, f"{type(e).__name__}: {e}",
+                                             zip_name, zip_member)
+            else:
+                if summary is not None:
+                    try:
+                        entry["summary"] = summarize_extracted(cfdi_type, extracted)
+                    except Exception as e:
+                        entry["summary_error"] = build_error(
+                            cfdi_filename, cfdi_type, f"Filas exportadas, excluido del Resumen: {type(e).__name__}: {e}",
+                            zip_name, zip_member, stage="Resumen")
+        apply_entry(entry)
+
+        if journal_filename:
+            pending.append(entry)
+            if len(pending) >= checkpoint_every:
+                commit_checkpoint(journal_filename, fingerprint, pending, pending_headers)
+                pending, pending_headers = [], {}
+
+    if journal_filename and pending:
+        commit_checkpoint(journal_filename, fingerprint, pending, pending_headers)
+
+    # Rebuild the sheets in input order so a resumed run gives the same workbook
+    sheets = {}
+    for cfdi_filename, zip_name, zip_member in cfdi_files:
+        for sheet_name, rows in results.get(cfdi_key(cfdi_filename, zip_name, zip_member), []):
+            sheets.setdefault(sheet_name, []).extend(rows)
+
+    blocks = [(name, headers[name], rows) for name, rows in sheets.items()]
+    max_rows = row_cap + 1 if row_cap else EXCEL_MAX_ROWS
+    # row_cap only applies to data sheets; the Resumen is written whole
+    if partition_by:
+        written = write_partitions(blocks, output_filename, partition_by, row_cap)
+        if summary is not None:
+            written.append(write_workbook([buildSummary_rows(summary)],
+                                          partition_filename(output_filename, "Resumen")))
     else:
-        counters["Desconocido"] += 1
-        print(f"Unknown CFDI type: {cfdi_type}")
+        if summary is not None:
+            blocks.append(buildSummary_rows(summary))
+        written = [write_workbook(blocks, output_filename, max_rows, uncapped_sheets=("Resumen",))]
+
+    if journal_filename and os.path.exists(journal_filename):
+        os.remove(journal_filename)
+    return written
 
 
 def unzip_folder(origin_zip_filename, destination_folder):
@@ -49,15 +565,23 @@ def unzip_folder(origin_zip_filename, destination_folder):
         destination_folder (str): Path where files will be extracted.
 
     Returns:
-        list: List of paths to the extracted files.
+        list: List of paths to the files extracted from this ZIP.
     """
+    # extract() cleans up names such as "../a.xml" or "/a.xml" and returns where
+    # each member really landed; only those paths, and only this ZIP's members,
+    # are returned so nothing outside the folder is read or attributed to it.
+    root = os.path.realpath(destination_folder)
+    extracted, seen = [], set()
     with ZipFile(origin_zip_filename, 'r') as zip_ref:
-        zip_ref.extractall(destination_folder)
-
-    return [
-        os.path.join(destination_folder, f)
-        for f in os.listdir(destination_folder)
-    ]
+        for member in zip_ref.infolist():
+            if member.is_dir():
+                continue
+            path = zip_ref.extract(member, destination_folder)
+            if os.path.commonpath([root, os.path.realpath(path)]) != root or path in seen:
+                continue
+            seen.add(path)
+            extracted.append(path)
+    return extracted
 
 
 def main():
@@ -69,24 +593,32 @@ def main():
 
     zips_folder = "./test"
     output_filename = "./Excel_final.xlsx"
-    counters = {"Total": 0, "I/E": 0, "P": 0, "N": 0, "Unknown": 0}
+    journal_filename = "./Excel_final.journal"
+    counters = {"Total": 0, "I/E": 0, "P": 0, "N": 0, "Desconocido": 0, "Errores": 0}
+    errors = []
 
     with tempfile.TemporaryDirectory() as unzipped_folder:
+        cfdi_files = []
         for zip_file in os.listdir(zips_folder):
             zip_path = os.path.join(zips_folder, zip_file)
             if zip_file.lower().endswith(".zip"):
                 print(f"Processing zip file: {zip_file}")
-                extracted_files = unzip_folder(zip_path, unzipped_folder)
+                # One folder per ZIP so equal member names don't overwrite each other
+                zip_folder = os.path.join(unzipped_folder, zip_file)
+                extracted_files = unzip_folder(zip_path, zip_folder)
 
                 for cfdi_file in extracted_files:
                     if cfdi_file.lower().endswith(".xml"):
-                        counters["Total"] += 1
-                        print(f"Processing CFDI file: {cfdi_file}")
-                        process_cfdi(cfdi_file, output_filename, counters)
+                        cfdi_files.append((cfdi_file, zip_file, os.path.relpath(cfdi_file, zip_folder)))
+
+        process_batch(cfdi_files, output_filename, counters, errors, journal_filename)
+        if errors:
+            saveErrors_to_excel(errors, output_filename)
 
     print("\nProcessing Summary:")
     print(f"Total XML files processed: {counters['Total']}")
     print(f" - I/E (Ingreso/Egreso): {counters['I/E']}")
     print(f" - P (Pago): {counters['P']}")
     print(f" - N (Nómina): {counters['N']}")
-    print(f" - Unknown: {counters['Unknown']}")
+    print(f" - Unknown: {counters['Desconocido']}")
+    print(f" - Errors: {counters['Errores']}")
@@ -0,0 +1,184 @@
+"""
+Module containing the registry of CFDI extractors.
+
+An extractor declares which CFDIs it handles (type, version and, for
+complementos, the namespace it needs), the sheets and columns it writes,
+and the functions that parse the XML and build the rows. The built-in
+Ingreso/Egreso, Pago and Nómina extractors are registered here; other
+packages can add their own (Carta Porte, Comercio Exterior, Traslado...)
+through the "invoice_processor.extractors" entry point group:
+
+    [project.entry-points."invoice_processor.extractors"]
+    carta_porte = "mi_paquete.carta_porte:EXTRACTOR"
+
+The entry point may point to an Extractor or to a list of them. Every
+extractor that matches a CFDI runs in the same pass, so its rows go through
+the same batch, journal, partitioning and summary as the built-in ones.
+"""
+
+from collections import namedtuple
+from importlib.metadata import entry_points
+from extractors import (parse_IE, parse_P, parse_N, buildIE_rows, buildP_rows, buildN_rows,
+                        IE_HEADERS, P_HEADERS, N_HEADERS)
+from summary import summarize_cfdi
+
+ENTRY_POINT_GROUP = "invoice_processor.extractors"
+
+# name:       Unique name of the extractor.
+# types:      TipoDeComprobante values it handles ("I", "E", "P", "N", "T").
+# sheets:     Sheet name -> headers of every sheet it writes.
+# parse:      parse(root) -> data, or None if the CFDI doesn't apply. root is the
+#             cfdi:Comprobante element, parsed once and shared by all extractors.
+# build_rows: build_rows(data) -> list of (sheet name, headers, rows), one per
+#             sheet written; each must match a sheet declared in ``sheets``.
+# versions:   CFDI versions it handles ("4.0", "3.3"); None for any.
+# complement: Namespace URI that must be present in cfdi:Complemento; None for any.
+# counter:    Key of the counters dict it increments; None for complementos
+#             that only add rows to a CFDI already counted by another extractor.
+# summarize:  summarize(cfdi_type, data) -> entries for summary.add_to_summary.
+Extractor = namedtuple(
+    "Extractor",
+    ["name", "types", "sheets", "parse", "build_rows",
+     "versions", "complement", "counter", "summarize"],
+    defaults=(None, None, None, None)
+)
+
+BUILTIN_EXTRACTORS = (
+    Extractor("ingreso_egreso", ("I", "E"), {"Ingresos": IE_HEADERS, "Egresos": IE_HEADERS},
+              parse_IE, lambda data: [buildIE_rows(data)], counter="I/E", summarize=summarize_cfdi),
+    Extractor("pago", ("P",), {"Pagos": P_HEADERS},
+              parse_P, lambda data: [buildP_rows(data)], counter="P", summarize=summarize_cfdi),
+    Extractor("nomina", ("N",), {"Nómina": N_HEADERS},
+              parse_N, lambda data: [buildN_rows(data)], counter="N", summarize=summarize_cfdi),
+)
+
+
+def load_plugins():
+    """
+    Loads the extractors published by installed packages.
+
+    A plugin that fails to import, or that doesn't provide Extractor
+    objects, is reported and skipped so it can't prevent the application
+    from starting.
+
+    Returns:
+        list: Extractors found through the entry point group.
+    """
+    plugins = []
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            loaded = entry_point.load()
+            items = [loaded] if isinstance(loaded, Extractor) else list(loaded)
+        except Exception as e:
+            print(f"Could not load extractor plugin {entry_point.name}: {e}")
+            continue
+        for item in items:
+            if isinstance(item, Extractor):
+                plugins.append(item)
+            else:
+                print(f"Ignoring extractor plugin {entry_point.name}: {item!r} is not an Extractor")
+    return plugins
+
+
+def build_registry(extractors):
+    """
+    Precomputes the extractors to run for every (type, version) pair.
+
+    Args:
+        extractors (list): Extractor definitions, in the order they should run.
+
+    Returns:
+        dict: (type, version) -> tuple of extractors; the (type, None) key
+              holds the extractors that accept any version.
+
+    Raises:
+        ValueError: If two extractors share a name, or write the same sheet
+            with different columns.
+    """
+    names, sheets = set(), {}
+    for extractor in extractors:
+        if extractor.name in names:
+            raise ValueError(f"Duplicate extractor name: {extractor.name}")
+        names.add(extractor.name)
+        for sheet_name, headers in extractor.sheets.items():
+            if sheets.setdefault(sheet_name, list(headers)) != list(headers):
+                raise ValueError(f"Sheet {sheet_name} is declared with different columns")
+
+    registry = {}
+    for cfdi_type in {t for e in extractors for t in e.types}:
+        handlers = [e for e in extractors if cfdi_type in e.types]
+        registry[(cfdi_type, None)] = tuple(e for e in handlers if e.versions is None)
+        for version in {v for e in handlers for v in (e.versions or ())}:
+            registry[(cfdi_type, version)] = tuple(
+                e for e in handlers if e.versions is None or version in e.versions
+            )
+    return registry
+
+
+_extractors = list(BUILTIN_EXTRACTORS)
+for _plugin in load_plugins():
+    try:
+        build_registry(_extractors + [_plugin])
+    except ValueError as e:
+        print(f"Ignoring extractor plugin {_plugin.name}: {e}")
+        continue
+    _extractors.append(_plugin)
+REGISTRY = build_registry(_extractors)
+
+
+def register_extractor(extractor):
+    """
+    Adds an extractor at runtime, e.g. from an application that is not
+    installed as a package and therefore has no entry points.
+
+    Args:
+        extractor (Extractor): Definition to add after the existing ones.
+
+    Returns:
+        None
+    """
+    global REGISTRY
+    REGISTRY = build_registry(_extractors + [extractor])
+    _extractors.append(extractor)
+
+
+def check_blocks(extractor, blocks):
+    """
+    Verifies that the blocks returned by an extractor's build_rows only use
+    the sheets and columns it declared, so rows can't end up misaligned.
+
+    Args:
+        extractor (Extractor): The extractor that built the blocks.
+        blocks (list): (sheet name, headers, rows) tuples.
+
+    Returns:
+        list: The same blocks.
+
+    Raises:
+        ValueError: If a sheet is not declared, its headers differ from the
+            declaration, or a row has more cells than headers.
+    """
+    for sheet_name, headers, rows in blocks:
+        if sheet_name not in extractor.sheets:
+            raise ValueError(f"{extractor.name} wrote undeclared sheet {sheet_name}")
+        if list(headers) != list(extractor.sheets[sheet_name]):
+            raise ValueError(f"{extractor.name} wrote sheet {sheet_name} with undeclared columns")
+        if any(len(row) > len(headers) for row in rows):
+            raise ValueError(f"{extractor.name} wrote rows longer than the headers of {sheet_name}")
+    return blocks
+
+
+def find_extractors(cfdi_type, version=None, complements=frozenset()):
+    """
+    Returns the extractors that apply to a CFDI.
+
+    Args:
+        cfdi_type (str): TipoDeComprobante of the CFDI.
+        version (str, optional): Version attribute of the CFDI.
+        complements (frozenset): Namespaces found in its cfdi:Complemento.
+
+    Returns:
+        tuple: Matching extractors, in registration order.
+    """
+    handlers = REGISTRY.get((cfdi_type, version)) or REGISTRY.get((cfdi_type, None), ())
+    return tuple(e for e in handlers if e.complement is None or e.complement in complements)
@@ -0,0 +1,142 @@
+"""
+Module containing functions to keep running totals of the processed CFDIs,
+grouped by type, emisor, receptor, month and currency, and to export them
+as a "Resumen" sheet.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+# Amounts added up for each CFDI type
+SUMMARY_FIELDS = {
+    'I': ("SubTotal", "Total"),
+    'E': ("SubTotal", "Total"),
+    'P': ("Monto", "ImpPagado"),
+    'N': ("TotalPercepciones", "TotalDeducciones"),
+}
+
+SUMMARY_HEADERS = [
+    "Tipo", "RFC Emisor", "RFC Receptor", "Mes", "Moneda", "Comprobantes",
+    "SubTotal", "Total", "Monto", "Imp Pagado", "Total Percepciones", "Total Deducciones"
+]
+AMOUNT_COLUMNS = ["SubTotal", "Total", "Monto", "ImpPagado", "TotalPercepciones", "TotalDeducciones"]
+
+
+def to_amount(value):
+    """
+    Converts an amount attribute to Decimal; a missing amount counts as zero.
+
+    Raises:
+        ValueError: If the amount is not a number (e.g. "1,000.00" or "N/A").
+    """
+    try:
+        amount = Decimal(value or 0)
+    except InvalidOperation:
+        raise ValueError(f"Importe no numérico: {value!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Importe no numérico: {value!r}")
+    return amount
+
+
+def summarize_cfdi(cfdi_type, data):
+    """
+    Returns the contribution of one parsed CFDI to the summary.
+
+    Args:
+        cfdi_type (str): "I", "E", "P" or "N".
+        data (dict): Output of the matching parse_* function.
+
+    Returns:
+        list: [group, documents, amounts] entries, where group is
+              [tipo, rfc emisor, rfc receptor, mes, moneda] and amounts maps
+              each field of SUMMARY_FIELDS to a string. Only plain JSON types
+              are used so the entries can be stored in the batch journal.
+
+    Raises:
+        ValueError: If one of the amounts is not a number.
+    """
+    if cfdi_type not in SUMMARY_FIELDS:
+        return []
+
+    emisor = data['Emisor'].get('Rfc')
+    receptor = data['Receptor'].get('Rfc')
+
+    if cfdi_type == 'P':
+        # A payment can cover several months and currencies: one group per Pago.
+        # Monto is stated in MonedaP and ImpPagado in the MonedaDR of each
+        # document, so each amount goes to the group of its own currency.
+        entries = []
+        for number, pago in enumerate(data['Pagos']):
+            moneda_p = pago.get('MonedaP')
+            by_currency = {moneda_p: {'Monto': to_amount(pago.get('Monto'))}}
+            for docto in pago['DoctosRelacionados']:
+                amounts = by_currency.setdefault(docto.get('MonedaDR') or moneda_p, {})
+                amounts['ImpPagado'] = amounts.get('ImpPagado', Decimal(0)) + to_amount(docto.get('ImpPagado'))
+            for moneda, amounts in by_currency.items():
+                group = [cfdi_type, emisor, receptor, (pago.get('FechaPago') or '')[:7], moneda]
+                # The CFDI is counted once, in the MonedaP group of its first Pago
+                documents = 1 if number == 0 and moneda == moneda_p else 0
+                entries.append([group, documents, {field: str(a) for field, a in amounts.items()}])
+        return entries
+
+    comprobante = data['Comprobante']
+    group = [cfdi_type, emisor, receptor, (comprobante.get('Fecha') or '')[:7], comprobante.get('Moneda')]
+    if cfdi_type == 'N':
+        amounts = {
+            'TotalPercepciones': to_amount(data['Nomina']['TotalPercepciones']),
+            'TotalDeducciones': to_amount(data['Nomina']['TotalDeducciones']),
+        }
+    else:
+        amounts = {'SubTotal': to_amount(comprobante.get('SubTotal')), 'Total': to_amount(comprobante.get('Total'))}
+    return [[group, 1, {field: str(amount) for field, amount in amounts.items()}]]
+
+
+def add_to_summary(summary, entries):
+    """
+    Adds the entries returned by summarize_cfdi to the running totals.
+
+    Args:
+        summary (dict): Running totals, (group tuple) -> {"Comprobantes": int, field: Decimal}.
+        entries (list): Contribution of one CFDI, with amounts already
+            validated by summarize_cfdi.
+
+    Returns:
+        None
+    """
+    for group, documents, amounts in entries:
+        totals = summary.setdefault(tuple(group), {'Comprobantes': 0})
+        totals['Comprobantes'] += documents
+        for field, amount in amounts.items():
+            totals[field] = totals.get(field, Decimal(0)) + Decimal(amount or 0)
+
+
+def buildSummary_rows(summary):
+    """
+    Builds the rows of the "Resumen" sheet.
+
+    Returns:
+        tuple: (sheet name, headers, list of rows)
+    """
+    rows = []
+    for group in sorted(summary, key=lambda g: tuple(v or '' for v in g)):
+        totals = summary[group]
+        rows.append(list(group) + [totals['Comprobantes']] + [totals.get(c) for c in AMOUNT_COLUMNS])
+    return "Resumen", SUMMARY_HEADERS, rows
+
+
+def summary_totals(summary):
+    """
+    Collapses the summary to totals per type and currency.
+
+    Returns:
+        dict: {tipo: {moneda: {field: "amount"}}}, small enough for a response header.
+    """
+    totals = {}
+    for (tipo, _emisor, _receptor, _mes, moneda), amounts in summary.items():
+        by_currency = totals.setdefault(tipo, {}).setdefault(moneda or '', {})
+        for field, amount in amounts.items():
+            by_currency[field] = by_currency.get(field, 0) + amount
+    return {
+        tipo: {moneda: {field: str(amount) for field, amount in amounts.items()}
+               for moneda, amounts in by_currency.items()}
+        for tipo, by_currency in totals.items()
+    }